@@ -1,15 +1,32 @@
 """
 GUI module for the Edge Detection application.
 """
+import queue
+import threading
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
+from PIL import Image
 import cv2
 import numpy as np
 from typing import Optional, Tuple
 from image_processor import ImageProcessor
 
 
+# Delay before a threshold slider change triggers edge detection
+THRESHOLD_DEBOUNCE_MS = 80
+
+# How often the Tk thread checks for results from the edge detection worker
+EDGE_RESULT_POLL_MS = 20
+
+
+def to_pnm_bytes(image: np.ndarray) -> bytes:
+    """Encode an image as binary PGM (grayscale) or PPM (BGR) data that Tk can read directly."""
+    height, width = image.shape[:2]
+    if len(image.shape) == 2:
+        return b'P5\n%d %d\n255\n' % (width, height) + image.tobytes()
+    return b'P6\n%d %d\n255\n' % (width, height) + cv2.cvtColor(image, cv2.COLOR_BGR2RGB).tobytes()
+
+
 class EdgeDetectionApp:
     """Main GUI application for edge detection."""
     
@@ -23,8 +40,28 @@ class EdgeDetectionApp:
         self.start_pos = None
         self.current_rect = None
         self.photo_image = None
+        self.photo_item = None  # Canvas item showing photo_image
+        # Canvas size, updated on <Configure>
+        self._canvas_width = 1
+        self._canvas_height = 1
+        # Mapping from displayed image to source image, set by display_image
+        self._display_scale = None
+        self._display_offset = (0, 0)
+        self._pending_after = None  # Pending debounced edge recomputation
+        
+        # Edge detection runs on a worker thread so the sliders stay responsive.
+        # The request queue holds only the latest request and results come back
+        # through a queue polled by the Tk thread. The lock guards the processor,
+        # and the generation counts edits made on the Tk thread so that results
+        # computed before an edit are not shown over it.
+        self._edge_requests = queue.Queue(maxsize=1)
+        self._edge_results = queue.Queue()
+        self._processor_lock = threading.Lock()
+        self._edit_generation = 0
+        threading.Thread(target=self._edge_worker, daemon=True).start()
         
         self._setup_ui()
+        self.root.after(EDGE_RESULT_POLL_MS, self._poll_edge_results)
         
     def _setup_ui(self):
         """Set up the user interface."""
@@ -36,6 +73,9 @@ class EdgeDetectionApp:
         button_config = {'width': 20, 'pady': 5}
         
         tk.Button(left_panel, text="Load Image", command=self.load_image, **button_config).pack(pady=5)
+        # Opt-in: edges are then found and saved at the reduced resolution
+        self.reduce_large_images = tk.BooleanVar(value=False)
+        tk.Checkbutton(left_panel, text="Load large images reduced", variable=self.reduce_large_images, bg='lightgray').pack(pady=5)
         tk.Button(left_panel, text="Crop Image", command=self.start_crop_mode, **button_config).pack(pady=5)
         tk.Button(left_panel, text="Find Edges", command=self.find_edges, **button_config).pack(pady=5)
 
@@ -71,6 +111,12 @@ class EdgeDetectionApp:
         self.canvas.bind('<Button-1>', self.on_mouse_down)
         self.canvas.bind('<B1-Motion>', self.on_mouse_drag)
         self.canvas.bind('<ButtonRelease-1>', self.on_mouse_up)
+        self.canvas.bind('<Configure>', self._on_canvas_configure)
+        
+    def _on_canvas_configure(self, event):
+        """Cache the canvas size when it changes."""
+        self._canvas_width = event.width
+        self._canvas_height = event.height
         
     def update_status(self, message: str):
         """Update the status label."""
@@ -85,41 +131,80 @@ class EdgeDetectionApp:
         
         if filepath:
             try:
-                self.processor.load_image(filepath)
+                reduction = self._choose_load_reduction(filepath)
+                with self._processor_lock:
+                    self.processor.load_image(filepath, reduction)
+                    self._edit_generation += 1
                 self.display_image()
-                self.update_status("Image loaded successfully")
+                if reduction > 1:
+                    self.update_status(f"Image loaded at 1/{reduction} resolution")
+                else:
+                    self.update_status("Image loaded successfully")
             except Exception as e:
                 messagebox.showerror("Error", f"Failed to load image: {str(e)}")
                 
-    def display_image(self):
-        """Display the current image on the canvas."""
-        image = self.processor.get_current_display_image()
-        if image is None:
-            return
+    def _choose_load_reduction(self, filepath: str) -> int:
+        """Choose the largest decode reduction that still leaves the image at least twice its displayed size."""
+        if not self.reduce_large_images.get():
+            return 1
+        if self._canvas_width <= 1 or self._canvas_height <= 1:
+            return 1
         
-        # Convert to RGB if grayscale
-        if len(image.shape) == 2:
-            display_image = cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
-        else:
-            display_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+        try:
+            with Image.open(filepath) as header:
+                img_width, img_height = header.size
+        except Exception:
+            return 1
         
-        # Convert to PIL Image
-        pil_image = Image.fromarray(display_image)
+        # The displayed size is limited by whichever side fills the canvas
+        fit_ratio = max(img_width / self._canvas_width, img_height / self._canvas_height)
+        for reduction in (8, 4, 2):
+            if fit_ratio / reduction >= 2:
+                return reduction
+        return 1
         
-        # Resize to fit canvas while maintaining aspect ratio
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
+    def display_image(self, image: Optional[np.ndarray] = None):
+        """Display an image on the canvas, by default the processor's current display image."""
+        if image is not None:
+            self._draw_image(image)
+            return
+        
+        # The worker may be writing the processor's edges, so read them under the lock
+        with self._processor_lock:
+            image = self.processor.get_current_display_image()
+            if image is not None:
+                self._draw_image(image)
+        
+    def _draw_image(self, image: np.ndarray):
+        """Scale an image to fit the canvas and draw it."""
+        canvas_width = self._canvas_width
+        canvas_height = self._canvas_height
         
+        # Shrink to fit canvas while maintaining aspect ratio
+        img_height, img_width = image.shape[:2]
         if canvas_width > 1 and canvas_height > 1:
-            pil_image.thumbnail((canvas_width, canvas_height), Image.Resampling.LANCZOS)
-        
-        # Convert to PhotoImage and display
-        self.photo_image = ImageTk.PhotoImage(pil_image)
-        self.canvas.delete('all')
-        self.canvas.create_image(
-            canvas_width // 2, canvas_height // 2,
-            image=self.photo_image, anchor=tk.CENTER
-        )
+            scale = min(canvas_width / img_width, canvas_height / img_height)
+            if scale < 1:
+                target_size = (max(1, round(img_width * scale)), max(1, round(img_height * scale)))
+                image = cv2.resize(image, target_size, interpolation=cv2.INTER_AREA)
+        
+        data = to_pnm_bytes(image)
+        
+        # Remember where the image is drawn for converting mouse coordinates
+        scaled_height, scaled_width = image.shape[:2]
+        self._display_scale = scaled_width / img_width
+        self._display_offset = ((canvas_width - scaled_width) // 2, (canvas_height - scaled_height) // 2)
+        
+        # Load into the existing PhotoImage and canvas item when there is one
+        if self.photo_item is None:
+            self.photo_image = tk.PhotoImage(data=data, format='PPM')
+            self.photo_item = self.canvas.create_image(
+                canvas_width // 2, canvas_height // 2,
+                image=self.photo_image, anchor=tk.CENTER
+            )
+        else:
+            self.photo_image.configure(width=scaled_width, height=scaled_height, data=data, format='PPM')
+            self.canvas.coords(self.photo_item, canvas_width // 2, canvas_height // 2)
         
     def start_crop_mode(self):
         """Start crop mode."""
@@ -141,20 +226,21 @@ class EdgeDetectionApp:
         """Handle mouse button press."""
         if self.mode in ['crop', 'modify_edges']:
             self.start_pos = (event.x, event.y)
+            # Create the selection rectangle once and move it while dragging
+            self.current_rect = self.canvas.create_rectangle(
+                event.x, event.y, event.x, event.y,
+                outline='red', width=2, state='hidden'
+            )
             
     def on_mouse_drag(self, event):
         """Handle mouse drag."""
-        if self.mode in ['crop', 'modify_edges'] and self.start_pos:
-            # Remove previous rectangle
-            if self.current_rect:
-                self.canvas.delete(self.current_rect)
-            
-            # Draw new rectangle
-            self.current_rect = self.canvas.create_rectangle(
+        if self.mode in ['crop', 'modify_edges'] and self.start_pos and self.current_rect:
+            self.canvas.coords(
+                self.current_rect,
                 self.start_pos[0], self.start_pos[1],
-                event.x, event.y,
-                outline='red', width=2
+                event.x, event.y
             )
+            self.canvas.itemconfigure(self.current_rect, state='normal')
             
     def on_mouse_up(self, event):
         """Handle mouse button release."""
@@ -169,10 +255,14 @@ class EdgeDetectionApp:
                 
                 try:
                     if self.mode == 'crop':
-                        self.processor.crop_image(x1, y1, x2, y2)
+                        with self._processor_lock:
+                            self.processor.crop_image(x1, y1, x2, y2)
+                            self._edit_generation += 1
                         self.update_status("Image cropped")
                     elif self.mode == 'modify_edges':
-                        self.processor.delete_edges_in_region(x1, y1, x2, y2)
+                        with self._processor_lock:
+                            self.processor.delete_edges_in_region(x1, y1, x2, y2)
+                            self._edit_generation += 1
                         self.update_status("Edges deleted")
                     
                     self.display_image()
@@ -189,21 +279,12 @@ class EdgeDetectionApp:
     def _canvas_to_image_coords(self, start: Tuple[int, int], end: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
         """Convert canvas coordinates to image coordinates."""
         image = self.processor.get_current_display_image()
-        if image is None:
+        if image is None or self._display_scale is None:
             return None
         
-        canvas_width = self.canvas.winfo_width()
-        canvas_height = self.canvas.winfo_height()
-        
         img_height, img_width = image.shape[:2]
-        
-        # Calculate scale and offset
-        scale = min(canvas_width / img_width, canvas_height / img_height)
-        scaled_width = int(img_width * scale)
-        scaled_height = int(img_height * scale)
-        
-        offset_x = (canvas_width - scaled_width) // 2
-        offset_y = (canvas_height - scaled_height) // 2
+        scale = self._display_scale
+        offset_x, offset_y = self._display_offset
         
         # Convert coordinates
         x1 = int((start[0] - offset_x) / scale)
@@ -220,28 +301,74 @@ class EdgeDetectionApp:
         return x1, y1, x2, y2
         
     def _on_threshold_change(self, _=None):
-        """Handle Canny threshold slider changes."""
-        self.find_edges()
+        """Handle Canny threshold slider changes.
+
+        Recomputation is debounced so that dragging a slider only runs edge
+        detection once the value has settled.
+        """
+        if self._pending_after is not None:
+            self.root.after_cancel(self._pending_after)
+        self._pending_after = self.root.after(THRESHOLD_DEBOUNCE_MS, self.find_edges)
 
     def find_edges(self):
         """Find edges in the current image."""
+        if self._pending_after is not None:
+            self.root.after_cancel(self._pending_after)
+            self._pending_after = None
+        
         if self.processor.current_image is None:
             messagebox.showwarning("Warning", "Please load an image first")
             return
         
+        # Replace any request the worker has not picked up yet
+        request = (self.processor, self.low_threshold.get(), self.high_threshold.get())
+        try:
+            self._edge_requests.get_nowait()
+        except queue.Empty:
+            pass
+        self._edge_requests.put(request)
+        self.update_status("Finding edges...")
+    
+    def _edge_worker(self):
+        """Run queued edge detection requests off the Tk thread."""
+        while True:
+            processor, low, high = self._edge_requests.get()
+            edges = error = None
+            with self._processor_lock:
+                generation = self._edit_generation
+                try:
+                    # Copy out so the Tk thread can draw without taking the lock
+                    edges = processor.find_edges(low_threshold=low, high_threshold=high).copy()
+                except Exception as e:
+                    error = e
+            self._edge_results.put((processor, generation, low, high, edges, error))
+    
+    def _poll_edge_results(self):
+        """Show the newest result from the edge detection worker, if any."""
+        result = None
         try:
-            low = self.low_threshold.get()
-            high = self.high_threshold.get()
-            self.processor.find_edges(low_threshold=low, high_threshold=high)
-            self.display_image()
-            self.update_status(f"Edges detected with thresholds: {low}, {high}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to find edges: {str(e)}")
+            while True:
+                result = self._edge_results.get_nowait()
+        except queue.Empty:
+            pass
+        if result is not None:
+            self._on_edge_result(*result)
+        self.root.after(EDGE_RESULT_POLL_MS, self._poll_edge_results)
+    
+    def _on_edge_result(self, processor: ImageProcessor, generation: int, low: int, high: int,
+                        edges: Optional[np.ndarray], error: Optional[Exception]):
+        """Show edges produced by the worker thread."""
+        if processor is not self.processor or generation != self._edit_generation:
+            return  # Superseded by a reset or an edit made while the worker was busy
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to find edges: {str(error)}")
+            return
+        self.display_image(edges)
+        self.update_status(f"Edges detected with thresholds: {low}, {high}")
     
     def save_image(self):
         """Save the current result."""
-        image = self.processor.get_current_display_image()
-        if image is None:
+        if self.processor.get_current_display_image() is None:
             messagebox.showwarning("Warning", "No image to save")
             return
         
@@ -253,7 +380,8 @@ class EdgeDetectionApp:
         
         if filepath:
             try:
-                self.processor.save_image(filepath, image)
+                with self._processor_lock:
+                    self.processor.save_image(filepath, self.processor.get_current_display_image())
                 self.update_status(f"Image saved to {filepath}")
                 messagebox.showinfo("Success", "Image saved successfully")
             except Exception as e:
@@ -262,10 +390,18 @@ class EdgeDetectionApp:
     def reset(self):
         """Reset the application to initial state."""
         if messagebox.askyesno("Reset", "Are you sure you want to reset? All progress will be lost."):
-            self.processor = ImageProcessor()
+            if self._pending_after is not None:
+                self.root.after_cancel(self._pending_after)
+                self._pending_after = None
+            with self._processor_lock:
+                self.processor = ImageProcessor()
+                self._edit_generation += 1
             self.mode = None
             self.start_pos = None
             self.current_rect = None
+            self._display_scale = None
+            self.photo_image = None
+            self.photo_item = None
             self.canvas.delete('all')
             self.update_status("Reset complete")
 
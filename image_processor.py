@@ -1,12 +1,25 @@
 """
 Image processor module for edge detection and line drawing.
 """
+from collections import OrderedDict
+
 import cv2
 import numpy as np
-from scipy.spatial.distance import cdist
 from typing import List, Tuple, Optional
 
 
+# cv2.imread flags for decoding at full, 1/2, 1/4 and 1/8 resolution
+REDUCED_READ_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+# Number of recent (low, high) threshold results kept for the current image
+EDGE_CACHE_SIZE = 8
+
+
 class ImageProcessor:
     """Handles image processing operations including edge detection and line drawing."""
     
@@ -14,13 +27,32 @@ class ImageProcessor:
         self.original_image = None
         self.current_image = None
         self.edges = None
+        # Blurred grayscale of current_image and its Sobel derivatives,
+        # reused across threshold changes (see _prepare_edge_inputs)
+        self._blurred = None
+        self._dx = None
+        self._dy = None
+        self._edge_inputs_src = None
+        # Recent edge maps for the current image, keyed by (low, high)
+        self._edge_cache = OrderedDict()
+        # Run blur and Canny on a CUDA device when OpenCV was built with CUDA,
+        # otherwise through OpenCL (T-API) when a device is available
+        self._use_cuda = hasattr(cv2, 'cuda') and cv2.cuda.getCudaEnabledDeviceCount() > 0
+        self._use_umat = not self._use_cuda and cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL()
+        self._cuda_blur = None
+        self._cuda_canny = None
         
-    def load_image(self, filepath: str) -> np.ndarray:
-        """Load an image from file."""
-        self.original_image = cv2.imread(filepath)
+    def load_image(self, filepath: str, reduction: int = 1) -> np.ndarray:
+        """Load an image from file, optionally decoding it at 1/2, 1/4 or 1/8 size."""
+        if reduction not in REDUCED_READ_FLAGS:
+            raise ValueError(f"Unsupported reduction factor: {reduction}")
+        
+        self.original_image = cv2.imread(filepath, REDUCED_READ_FLAGS[reduction])
         if self.original_image is None:
             raise ValueError(f"Unable to load image from {filepath}")
-        self.current_image = self.original_image.copy()
+        # Nothing modifies the image in place, so crops can be views of the original
+        self.current_image = self.original_image
+        self._edge_inputs_src = None
         return self.current_image
     
     def crop_image(self, x1: int, y1: int, x2: int, y2: int) -> np.ndarray:
@@ -32,6 +64,7 @@ class ImageProcessor:
         y1, y2 = min(y1, y2), max(y1, y2)
         
         self.current_image = self.current_image[y1:y2, x1:x2]
+        self._edge_inputs_src = None
         return self.current_image
     
     def find_edges(self, low_threshold: int = 50, high_threshold: int = 150) -> np.ndarray:
@@ -39,18 +72,82 @@ class ImageProcessor:
         if self.current_image is None:
             raise ValueError("No image loaded")
         
-        gray = cv2.cvtColor(self.current_image, cv2.COLOR_BGR2GRAY)
-        blurred = cv2.GaussianBlur(gray, (5, 5), 1.4)
-        self.edges = cv2.Canny(blurred, low_threshold, high_threshold)
+        self._prepare_edge_inputs()
+        key = (low_threshold, high_threshold)
+        cached = self._edge_cache.get(key)
+        
+        # Reuse the previous edge buffer when the image size is unchanged
+        height, width = self.current_image.shape[:2]
+        if self.edges is None or self.edges.shape != (height, width):
+            self.edges = np.empty((height, width), dtype=np.uint8)
+        
+        if cached is not None:
+            np.copyto(self.edges, cached)
+            self._edge_cache.move_to_end(key)
+            return self.edges
+        
+        if self._use_cuda:
+            self._cuda_canny.setLowThreshold(low_threshold)
+            self._cuda_canny.setHighThreshold(high_threshold)
+            self._cuda_canny.detect(self._blurred).download(self.edges)
+        elif self._use_umat:
+            np.copyto(self.edges, cv2.Canny(self._dx, self._dy, low_threshold, high_threshold).get())
+        else:
+            cv2.Canny(self._dx, self._dy, low_threshold, high_threshold, edges=self.edges)
+        
+        # Keep a private copy, since callers may edit self.edges in place
+        self._edge_cache[key] = self.edges.copy()
+        if len(self._edge_cache) > EDGE_CACHE_SIZE:
+            self._edge_cache.popitem(last=False)
         return self.edges
     
+    def _prepare_edge_inputs(self):
+        """Blur the current image and compute its Sobel derivatives, unless already done for this image.
+        
+        With CUDA the blurred image stays on the GPU as a GpuMat. With OpenCL
+        the derivatives stay on the device as cv2.UMat. Otherwise they are
+        numpy arrays reused between images of the same size.
+        """
+        if self._edge_inputs_src is self.current_image:
+            return
+        
+        self._edge_cache.clear()
+        # Canny computes the derivatives internally with a 3x3 Sobel and
+        # replicated borders; matching that keeps the output identical.
+        if self._use_cuda:
+            if self._cuda_blur is None:
+                self._cuda_blur = cv2.cuda.createGaussianFilter(cv2.CV_8UC1, cv2.CV_8UC1, (5, 5), 1.4)
+                self._cuda_canny = cv2.cuda.createCannyEdgeDetector(50, 150)
+            upload = cv2.cuda_GpuMat()
+            upload.upload(self.current_image)
+            gray = cv2.cuda.cvtColor(upload, cv2.COLOR_BGR2GRAY)
+            self._blurred = self._cuda_blur.apply(gray)
+        elif self._use_umat:
+            gray = cv2.cvtColor(cv2.UMat(self.current_image), cv2.COLOR_BGR2GRAY)
+            blurred = cv2.GaussianBlur(gray, (5, 5), 1.4)
+            self._dx = cv2.Sobel(blurred, cv2.CV_16S, 1, 0, ksize=3, borderType=cv2.BORDER_REPLICATE)
+            self._dy = cv2.Sobel(blurred, cv2.CV_16S, 0, 1, ksize=3, borderType=cv2.BORDER_REPLICATE)
+        else:
+            height, width = self.current_image.shape[:2]
+            if self._blurred is None or self._blurred.shape != (height, width):
+                self._blurred = np.empty((height, width), dtype=np.uint8)
+                self._dx = np.empty((height, width), dtype=np.int16)
+                self._dy = np.empty((height, width), dtype=np.int16)
+            cv2.cvtColor(self.current_image, cv2.COLOR_BGR2GRAY, dst=self._blurred)
+            cv2.GaussianBlur(self._blurred, (5, 5), 1.4, dst=self._blurred)
+            cv2.Sobel(self._blurred, cv2.CV_16S, 1, 0, dst=self._dx, ksize=3, borderType=cv2.BORDER_REPLICATE)
+            cv2.Sobel(self._blurred, cv2.CV_16S, 0, 1, dst=self._dy, ksize=3, borderType=cv2.BORDER_REPLICATE)
+        self._edge_inputs_src = self.current_image
+    
     def delete_edges_in_region(self, x1: int, y1: int, x2: int, y2: int) -> np.ndarray:
         """Delete edges within the specified rectangular region."""
         if self.edges is None:
             raise ValueError("No edges detected")
         
-        x1, x2 = min(x1, x2), max(x1, x2)
-        y1, y2 = min(y1, y2), max(y1, y2)
+        # Clamp explicitly, since negative slice indices would wrap around
+        height, width = self.edges.shape
+        x1, x2 = (max(0, min(width, x)) for x in sorted((x1, x2)))
+        y1, y2 = (max(0, min(height, y)) for y in sorted((y1, y2)))
         
         self.edges[y1:y2, x1:x2] = 0
         return self.edges
@@ -62,7 +159,11 @@ class ImageProcessor:
                 raise ValueError("No image to save")
             image = self.current_image
         
-        cv2.imwrite(filepath, image)
+        # Edge maps only hold 0 and 255, so they can be written as 1-bit PNGs
+        params = []
+        if image is self.edges and filepath.lower().endswith('.png'):
+            params = [cv2.IMWRITE_PNG_BILEVEL, 1]
+        cv2.imwrite(filepath, image, params)
     
     def get_current_display_image(self) -> Optional[np.ndarray]:
         """Get the current image to display based on processing state."""
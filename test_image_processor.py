@@ -47,6 +47,16 @@ class TestImageProcessor:
         assert processor.current_image is not None
         assert np.array_equal(processor.original_image, processor.current_image)
     
+    def test_load_image_reduced(self, processor, test_image_file):
+        """Test loading an image at reduced resolution."""
+        image = processor.load_image(test_image_file, reduction=2)
+        assert image.shape == (50, 50, 3)
+    
+    def test_load_image_invalid_reduction(self, processor, test_image_file):
+        """Test loading an image with an unsupported reduction factor."""
+        with pytest.raises(ValueError, match="Unsupported reduction factor"):
+            processor.load_image(test_image_file, reduction=3)
+    
     def test_load_image_invalid_path(self, processor):
         """Test loading an image with invalid path."""
         with pytest.raises(ValueError, match="Unable to load image"):
@@ -103,6 +113,26 @@ class TestImageProcessor:
         # The deleted region should be all zeros
         assert np.sum(processor.edges[0:50, 0:50]) == 0
     
+    def test_delete_edges_out_of_bounds(self, processor, test_image):
+        """Test that a region extending past the image is clamped, not wrapped."""
+        processor.current_image = test_image
+        processor.find_edges()
+        expected = processor.edges.copy()
+        expected[0:50, 0:50] = 0
+        
+        processor.delete_edges_in_region(-10, -10, 50, 50)
+        assert np.array_equal(processor.edges, expected)
+    
+    def test_delete_edges_outside_image(self, processor, test_image):
+        """Test that regions entirely off the image delete nothing."""
+        processor.current_image = test_image
+        processor.find_edges()
+        expected = processor.edges.copy()
+        
+        processor.delete_edges_in_region(-20, -20, -5, -5)
+        processor.delete_edges_in_region(120, 120, 150, 150)
+        assert np.array_equal(processor.edges, expected)
+    
     def test_delete_edges_no_edges(self, processor):
         """Test deleting edges without detecting edges first."""
         with pytest.raises(ValueError, match="No edges detected"):
@@ -117,6 +147,16 @@ class TestImageProcessor:
         saved_image = cv2.imread(str(output_path))
         assert saved_image is not None
     
+    def test_save_edges_png(self, processor, test_image, tmp_path):
+        """Test that saved edge maps read back unchanged."""
+        output_path = tmp_path / "edges.png"
+        processor.current_image = test_image
+        edges = processor.find_edges()
+        processor.save_image(str(output_path), edges)
+        
+        saved_edges = cv2.imread(str(output_path), cv2.IMREAD_GRAYSCALE)
+        assert np.array_equal(saved_edges, edges)
+    
     def test_save_image_no_image(self, processor):
         """Test saving without any image."""
         with pytest.raises(ValueError, match="No image to save"):
@@ -134,3 +174,63 @@ class TestImageProcessor:
         # Current image and edges
         processor.find_edges()
         assert np.array_equal(processor.get_current_display_image(), processor.edges)
+    
+    def test_find_edges_threshold_change(self, processor, test_image):
+        """Test that re-running edge detection with new thresholds matches a fresh run."""
+        processor.current_image = test_image
+        processor.find_edges(50, 150)
+        edges = processor.find_edges(10, 30).copy()
+        
+        fresh = ImageProcessor()
+        fresh.current_image = test_image
+        assert np.array_equal(edges, fresh.find_edges(10, 30))
+    
+    def test_find_edges_after_crop(self, processor, test_image):
+        """Test that edge detection uses the cropped image after a crop."""
+        processor.current_image = test_image
+        processor.find_edges()
+        processor.crop_image(20, 20, 80, 80)
+        edges = processor.find_edges()
+        
+        fresh = ImageProcessor()
+        fresh.current_image = test_image[20:80, 20:80]
+        assert edges.shape == (60, 60)
+        assert np.array_equal(edges, fresh.find_edges())
+    
+    def test_find_edges_after_delete(self, processor, test_image):
+        """Test that re-running edge detection restores deleted edges."""
+        processor.current_image = test_image
+        expected = processor.find_edges().copy()
+        processor.delete_edges_in_region(0, 0, 50, 50)
+        
+        assert np.array_equal(processor.find_edges(), expected)
+    
+    def test_find_edges_opencl_path(self, processor, test_image):
+        """Test edge detection through the UMat path (falls back to CPU without OpenCL)."""
+        processor._use_umat = True
+        processor.current_image = test_image
+        processor.crop_image(10, 10, 90, 90)
+        edges = processor.find_edges()
+        
+        assert isinstance(edges, np.ndarray)
+        assert edges.shape == (80, 80)
+        assert np.sum(edges) > 0
+        assert processor.find_edges(10, 30) is edges
+        processor.delete_edges_in_region(0, 0, 80, 80)
+        assert np.sum(processor.edges) == 0
+    
+    def test_find_edges_matches_canny(self, processor, test_image):
+        """Test that edge detection matches blurring and running cv2.Canny directly."""
+        processor.current_image = test_image
+        gray = cv2.cvtColor(test_image, cv2.COLOR_BGR2GRAY)
+        expected = cv2.Canny(cv2.GaussianBlur(gray, (5, 5), 1.4), 10, 30)
+        
+        assert np.array_equal(processor.find_edges(10, 30), expected)
+    
+    def test_find_edges_revisited_thresholds(self, processor, test_image):
+        """Test that returning to earlier thresholds gives the same edges."""
+        processor.current_image = test_image
+        first = processor.find_edges(10, 30).copy()
+        processor.find_edges(200, 400)
+        
+        assert np.array_equal(processor.find_edges(10, 30), first)